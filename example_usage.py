@@ -46,7 +46,7 @@ def example_specific_classes():
     # Save as CSV
     save_results(results, "output_specific_classes.csv", format='csv')
     
-    print(f"\nDetected {sum(len(v) for v in results['detections_by_class'].values())} objects")
+    print(f"\nDetected {results['total_detections']} objects")
 
 
 def example_get_timestamps_for_class():
@@ -63,8 +63,7 @@ def example_get_timestamps_for_class():
     
     # Get all timestamps for 'person' class
     if 'person' in results['detections_by_class']:
-        person_detections = results['detections_by_class']['person']
-        timestamps = [det['timestamp_formatted'] for det in person_detections]
+        timestamps = results['detections_by_class']['person']['timestamp_formatted']
         
         print(f"Person detected at {len(timestamps)} timestamps:")
         for i, ts in enumerate(timestamps[:10], 1):  # Show first 10
@@ -89,15 +88,14 @@ def example_detection_intervals():
     
     # Group consecutive detections into intervals
     if 'car' in results['detections_by_class']:
-        car_detections = results['detections_by_class']['car']
+        car_timestamps = results['detections_by_class']['car']['timestamp_seconds'].tolist()
         
-        if car_detections:
+        if car_timestamps:
             intervals = []
-            current_start = car_detections[0]['timestamp_seconds']
-            current_end = car_detections[0]['timestamp_seconds']
+            current_start = car_timestamps[0]
+            current_end = car_timestamps[0]
             
-            for det in car_detections[1:]:
-                ts = det['timestamp_seconds']
+            for ts in car_timestamps[1:]:
                 # If detection is within 1 second of previous, extend interval
                 if ts - current_end <= 1.0:
                     current_end = ts
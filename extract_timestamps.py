@@ -1,10 +1,33 @@
 import cv2
+import numpy as np
+import torch
 from ultralytics import YOLO
-import json
+from tqdm import tqdm
 from datetime import timedelta
-from collections import defaultdict
+from collections import Counter, defaultdict
+from contextlib import contextmanager
 import argparse
+import hashlib
+import json
+import multiprocessing
 import os
+import queue
+import shutil
+import threading
+
+try:
+    import orjson
+except ImportError:
+    # Standard-library json is used instead (slower on large results)
+    orjson = None
+
+
+# Directory where exported TensorRT engines / OpenVINO models are cached between runs
+ENGINE_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'yolo_engines')
+
+# Exports use a dynamic batch dimension up to this size, so one cached export serves
+# every batch size up to it
+ENGINE_MAX_BATCH = 32
 
 
 def format_timestamp(seconds):
@@ -17,8 +40,641 @@ def format_timestamp(seconds):
     return f"{hours:02d}:{minutes:02d}:{seconds:02d}.{milliseconds:03d}"
 
 
+def format_timestamps_vec(seconds):
+    """Convert an array of seconds to HH:MM:SS.mmm strings (vectorized format_timestamp)"""
+    seconds = np.asarray(seconds, dtype=np.float64)
+    # Round to whole microseconds first, as timedelta does, so the result matches
+    # format_timestamp exactly
+    whole_seconds = np.floor(seconds)
+    seconds = (whole_seconds * 1_000_000 + np.rint((seconds - whole_seconds) * 1_000_000)) / 1_000_000
+    total_seconds = seconds.astype(np.int64)
+    milliseconds = ((seconds - total_seconds) * 1000).astype(np.int64)
+    hours, remainder = np.divmod(total_seconds, 3600)
+    minutes, secs = np.divmod(remainder, 60)
+    if hours.size and hours.max() > 99:
+        # Three-digit hours don't fit the fixed-width layout below
+        return np.array([f"{h:02d}:{m:02d}:{s:02d}.{ms:03d}" for h, m, s, ms in
+                         zip(hours.tolist(), minutes.tolist(), secs.tolist(), milliseconds.tolist())])
+    
+    # Write the ASCII digits straight into a fixed-width (N, 12) byte buffer
+    chars = np.empty((len(seconds), 12), dtype=np.uint8)
+    chars[:, [2, 5]] = ord(':')
+    chars[:, 8] = ord('.')
+    for col, part, width in ((0, hours, 2), (3, minutes, 2), (6, secs, 2), (9, milliseconds, 3)):
+        for digit in range(width):
+            chars[:, col + width - 1 - digit] = part // 10 ** digit % 10 + ord('0')
+    return chars.view('S12').ravel().astype('U12')
+
+
+def _model_cache_key(model_path):
+    """
+    Short hash identifying a weights file, used to name its cached exports.
+    
+    Keyed on the absolute path plus size and mtime, so same-named weights from
+    different directories, or retrained in place, don't share an export. Weights
+    Ultralytics downloads by name (e.g. yolov8n.pt) don't exist yet; their name is used.
+    """
+    if os.path.exists(model_path):
+        stat = os.stat(model_path)
+        identity = f"{os.path.abspath(model_path)}:{stat.st_size}:{stat.st_mtime_ns}"
+    else:
+        identity = model_path
+    return hashlib.sha1(identity.encode()).hexdigest()[:8]
+
+
+def load_model(model_path, fp16=True, batch_size=16, use_tensorrt=True, imgsz=640, use_openvino=False):
+    """
+    Load a YOLO model, using a cached exported model when possible.
+    
+    On CUDA the weights are exported to a TensorRT engine (use_tensorrt); on CPU they
+    can be exported to OpenVINO (use_openvino). Exports happen once per (weights
+    file, precision, image size), with dynamic batch up to max(batch_size,
+    ENGINE_MAX_BATCH), and are stored in ENGINE_CACHE_DIR. Falls back to the PyTorch weights if export
+    fails; the failure is remembered (in a .failed file next to the export path) so
+    later runs don't retry it.
+    """
+    if not model_path.endswith('.pt'):
+        return YOLO(model_path)
+    
+    model_name = f"{os.path.splitext(os.path.basename(model_path))[0]}_{_model_cache_key(model_path)}"
+    max_batch = max(batch_size, ENGINE_MAX_BATCH)
+    # The batch size only appears in the name when it exceeds the default maximum
+    batch_tag = f"_bs{max_batch}" if max_batch > ENGINE_MAX_BATCH else ''
+    if use_tensorrt and torch.cuda.is_available():
+        precision = 'fp16' if fp16 else 'fp32'
+        export_path = os.path.join(ENGINE_CACHE_DIR, f"{model_name}_{precision}{batch_tag}_{imgsz}.engine")
+        export_args = {'format': 'engine', 'half': fp16, 'device': 0}
+    elif use_openvino and not torch.cuda.is_available():
+        # Ultralytics recognises OpenVINO models by the _openvino_model directory suffix
+        export_path = os.path.join(ENGINE_CACHE_DIR, f"{model_name}_fp32{batch_tag}_{imgsz}_openvino_model")
+        export_args = {'format': 'openvino'}
+    else:
+        return YOLO(model_path)
+    
+    failed_path = export_path + '.failed'
+    if os.path.exists(failed_path):
+        print(f"Skipping {export_args['format']} export, it failed before (delete {failed_path} to retry)")
+        return YOLO(model_path)
+    
+    if not os.path.exists(export_path):
+        print(f"Exporting {export_args['format']} model (one-time): {export_path}")
+        os.makedirs(ENGINE_CACHE_DIR, exist_ok=True)
+        try:
+            # dynamic=True so any batch up to max_batch (including a video's final,
+            # smaller batch) fits the exported model
+            exported_path = YOLO(model_path).export(batch=max_batch, imgsz=imgsz, dynamic=True, **export_args)
+            shutil.move(exported_path, export_path)
+        except Exception as e:
+            print(f"Model export failed ({e}), using PyTorch weights")
+            with open(failed_path, 'w') as f:
+                f.write(f"{e}\n")
+            return YOLO(model_path)
+    
+    return YOLO(export_path, task='detect')
+
+
+def _put_unless_stopped(target_queue, item, stop_event):
+    """Put item on a bounded queue, giving up if stop_event is set while waiting"""
+    while not stop_event.is_set():
+        try:
+            target_queue.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _get_unless_stopped(source_queue, stop_event):
+    """Get an item from a queue, returning None if stop_event is set while waiting"""
+    while not stop_event.is_set():
+        try:
+            return source_queue.get(timeout=0.1)
+        except queue.Empty:
+            continue
+    return None
+
+
+def _read_frame_batches(cap, batch_size, frame_stride, letterbox, half, start_frame, end_frame,
+                        batch_queue, stop_event):
+    """
+    Producer for _detect_frame_range: decode sampled frames in [start_frame, end_frame)
+    from cap and put (frame_indices, frames) batches on batch_queue, followed by a None
+    sentinel. end_frame=None reads to the end of the video. Errors are forwarded through
+    the queue so the consumer can re-raise them.
+    
+    Frames are BGR numpy arrays, or if letterbox is given (with CUDA, see _open_video),
+    model input tensors preprocessed on the GPU (see _make_frame_uploader).
+    """
+    frame_number = start_frame
+    batch_frames = []
+    batch_indices = []
+    to_tensor = None
+    if letterbox is not None:
+        to_tensor = _make_frame_uploader(batch_size, letterbox, half, bgr=True)
+    
+    def put_batch():
+        frames = to_tensor(batch_frames) if to_tensor else batch_frames
+        _put_unless_stopped(batch_queue, (batch_indices, frames), stop_event)
+    
+    try:
+        if start_frame:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, start_frame)
+            # Seeking is not frame-exact on every codec; number frames from where the
+            # capture actually landed and skip any before start_frame
+            frame_number = int(cap.get(cv2.CAP_PROP_POS_FRAMES))
+        
+        while cap.isOpened() and not stop_event.is_set():
+            if end_frame is not None and frame_number >= end_frame:
+                break
+            
+            # grab() demuxes/decodes only; retrieve() (the YUV->BGR conversion) runs
+            # just for the sampled frames
+            if not cap.grab():
+                break
+            if frame_number >= start_frame and frame_number % frame_stride == 0:
+                ret, frame = cap.retrieve()
+                if not ret:
+                    break
+                
+                batch_frames.append(frame)
+                batch_indices.append(frame_number)
+                if len(batch_frames) >= batch_size:
+                    put_batch()
+                    batch_frames = []
+                    batch_indices = []
+            
+            frame_number += 1
+        
+        # Flush the last partial batch
+        if batch_frames:
+            put_batch()
+    except Exception as e:
+        _put_unless_stopped(batch_queue, e, stop_event)
+    
+    _put_unless_stopped(batch_queue, None, stop_event)
+
+
+def _open_gpu_decoder(video_path):
+    """Open video_path with torchcodec, decoding on the GPU (NVDEC) when CUDA is available"""
+    try:
+        from torchcodec.decoders import VideoDecoder
+    except ImportError:
+        raise ImportError("decoder='torchcodec' requires the torchcodec package (pip install torchcodec)")
+    
+    device = 'cuda' if torch.cuda.is_available() else 'cpu'
+    return VideoDecoder(video_path, device=device)
+
+
+def _letterbox_geometry(height, width, imgsz=640, stride=32):
+    """
+    Letterbox geometry for tensor input, as Ultralytics' LetterBox computes it for
+    numpy frames: resize by gain = min(imgsz / height, imgsz / width), keeping the
+    aspect ratio, then pad (centred) up to a multiple of stride.
+    
+    Returns a dict with 'frame_size', 'resized_size' and 'input_size' as
+    (height, width), 'gain', and 'pad' as (left, top).
+    """
+    gain = min(imgsz / height, imgsz / width)
+    resized_height, resized_width = round(height * gain), round(width * gain)
+    pad_height, pad_width = -resized_height % stride, -resized_width % stride
+    return {
+        'frame_size': (height, width),
+        'resized_size': (resized_height, resized_width),
+        'input_size': (resized_height + pad_height, resized_width + pad_width),
+        'gain': gain,
+        'pad': (pad_width // 2, pad_height // 2)
+    }
+
+
+def _preprocess_frames(frames, letterbox, half):
+    """uint8 NCHW RGB frames -> letterboxed model input: float (float16 if half) in [0, 1]"""
+    frames = frames.to(torch.float16 if half else torch.float32)
+    frames = torch.nn.functional.interpolate(frames, size=letterbox['resized_size'], mode='bilinear',
+                                             align_corners=False) / 255
+    (resized_height, resized_width), (input_height, input_width) = letterbox['resized_size'], letterbox['input_size']
+    left, top = letterbox['pad']
+    # Grey (114) border, as in Ultralytics' LetterBox
+    return torch.nn.functional.pad(frames, (left, input_width - resized_width - left,
+                                            top, input_height - resized_height - top), value=114 / 255)
+
+
+def _make_frame_uploader(batch_size, letterbox, half, bgr=False):
+    """
+    Return a function that turns a list of uint8 HxWx3 frames (RGB, or BGR if bgr)
+    into a model input tensor as produced by _preprocess_frames.
+    
+    With CUDA, the channel swap, letterbox and normalisation all run on the GPU after a
+    single uint8 upload. Batches are staged in two reused pinned host buffers so uploads
+    are asynchronous DMA copies; each buffer's last upload is tracked with an event so
+    it is only refilled once that copy has finished. As with torchcodec input (see
+    _read_tensor_batches), Ultralytics copies each preprocessed batch back to the host
+    when building its results.
+    """
+    device = 'cuda' if torch.cuda.is_available() else 'cpu'
+    height, width = letterbox['frame_size']
+    staging = []
+    if device == 'cuda':
+        staging = [[torch.empty((batch_size, height, width, 3), dtype=torch.uint8, pin_memory=True), None]
+                   for _ in range(2)]
+    
+    def to_tensor(batch_frames):
+        if staging:
+            buffer, upload_done = staging[0]
+            if upload_done is not None:
+                upload_done.synchronize()
+            pinned = buffer[:len(batch_frames)]
+            np.stack(batch_frames, out=pinned.numpy())
+            frames = pinned.to(device, non_blocking=True)
+            upload_done = torch.cuda.Event()
+            upload_done.record()
+            staging[0][1] = upload_done
+            staging.append(staging.pop(0))
+        else:
+            frames = torch.from_numpy(np.stack(batch_frames))
+        
+        # NHWC -> NCHW RGB
+        frames = frames.permute(0, 3, 1, 2)
+        if bgr:
+            frames = frames.flip(1)
+        return _preprocess_frames(frames, letterbox, half)
+    
+    return to_tensor
+
+
+def _read_tensor_batches(decoder, batch_size, frame_stride, letterbox, half, start_frame, end_frame,
+                         batch_queue, stop_event):
+    """
+    Producer for _detect_frame_range when decoding with torchcodec: put
+    (frame_indices, frames) batches on batch_queue, where frames is an RGB float
+    tensor in [0, 1] letterboxed for the model on the decoder's device (float16 if half).
+    
+    Decoding and preprocessing stay on the GPU, but Ultralytics' postprocess still
+    copies every tensor batch back to the host as uint8 HWC images (one per frame, at
+    the model input size) to attach them to the results.
+    """
+    total_frames = len(decoder)
+    # First sampled frame at or after start_frame, keeping sampling aligned across ranges
+    first_frame = -(-start_frame // frame_stride) * frame_stride
+    sampled_indices = range(first_frame, total_frames if end_frame is None else end_frame, frame_stride)
+    
+    try:
+        for start in range(0, len(sampled_indices), batch_size):
+            if stop_event.is_set():
+                break
+            batch_indices = list(sampled_indices[start:start + batch_size])
+            
+            # uint8 NCHW RGB, already in GPU memory when decoding with NVDEC
+            frames = decoder.get_frames_at(indices=batch_indices).data
+            frames = _preprocess_frames(frames, letterbox, half)
+            _put_unless_stopped(batch_queue, (batch_indices, frames), stop_event)
+    except Exception as e:
+        _put_unless_stopped(batch_queue, e, stop_event)
+    
+    _put_unless_stopped(batch_queue, None, stop_event)
+
+
+def _open_pyav_container(video_path):
+    """Open video_path with PyAV, decoding with FFmpeg's own frame/slice threads"""
+    try:
+        import av
+    except ImportError:
+        raise ImportError("decoder='pyav' requires the av package (pip install av)")
+    
+    container = av.open(video_path)
+    container.streams.video[0].thread_type = 'AUTO'
+    return container
+
+
+def _pyav_fps(stream):
+    """Frame rate of a PyAV video stream, or 0 if the container doesn't record one"""
+    return float(stream.average_rate or stream.guessed_rate or 0)
+
+
+def _read_pyav_batches(container, batch_size, frame_stride, letterbox, half, start_frame, end_frame,
+                       batch_queue, stop_event):
+    """
+    Producer for _detect_frame_range when decoding with PyAV: same contract as
+    _read_tensor_batches. Frames are decoded straight to RGB and preprocessed as
+    tensors (on the GPU when available), so neither OpenCV's nor YOLO's BGR<->RGB
+    swap runs. Decoding runs in FFmpeg threads that release the GIL, so it does not
+    compete with the inference thread.
+    """
+    stream = container.streams.video[0]
+    # _open_video has already checked the stream has a frame rate
+    fps = _pyav_fps(stream)
+    start_offset = float(stream.start_time * stream.time_base) if stream.start_time else 0
+    to_tensor = _make_frame_uploader(batch_size, letterbox, half)
+    batch_frames = []
+    batch_indices = []
+    
+    def put_batch():
+        _put_unless_stopped(batch_queue, (batch_indices, to_tensor(batch_frames)), stop_event)
+    
+    try:
+        if start_frame:
+            # Lands on the keyframe at or before start_frame; earlier frames are skipped below
+            container.seek(int((start_frame / fps + start_offset) / stream.time_base), stream=stream)
+        
+        for frame in container.decode(stream):
+            if stop_event.is_set():
+                break
+            frame_number = round((frame.time - start_offset) * fps)
+            if frame_number < start_frame:
+                continue
+            if end_frame is not None and frame_number >= end_frame:
+                break
+            
+            if frame_number % frame_stride == 0:
+                batch_frames.append(frame.to_ndarray(format='rgb24'))
+                batch_indices.append(frame_number)
+                if len(batch_frames) >= batch_size:
+                    put_batch()
+                    batch_frames = []
+                    batch_indices = []
+        
+        # Flush the last partial batch
+        if batch_frames:
+            put_batch()
+    except Exception as e:
+        _put_unless_stopped(batch_queue, e, stop_event)
+    
+    _put_unless_stopped(batch_queue, None, stop_event)
+
+
+def _frame_size(source, decoder):
+    """(height, width) of the frames of a source returned by _open_video"""
+    if decoder == 'torchcodec':
+        return source.metadata.height, source.metadata.width
+    if decoder == 'pyav':
+        codec_context = source.streams.video[0].codec_context
+        return codec_context.height, codec_context.width
+    return int(source.get(cv2.CAP_PROP_FRAME_HEIGHT)), int(source.get(cv2.CAP_PROP_FRAME_WIDTH))
+
+
+def _open_video(video_path, decoder, imgsz=640):
+    """
+    Open video_path with the given decoder.
+    
+    Returns (source, fps, total_frames, letterbox). letterbox is the geometry (see
+    _letterbox_geometry) of the tensor input the decoder's reader produces, or None
+    when frames are passed to YOLO as numpy arrays (OpenCV without CUDA).
+    """
+    if decoder == 'torchcodec':
+        source = _open_gpu_decoder(video_path)
+        letterbox = _letterbox_geometry(*_frame_size(source, decoder), imgsz=imgsz)
+        return source, source.metadata.average_fps or 0, len(source), letterbox
+    
+    if decoder == 'pyav':
+        container = _open_pyav_container(video_path)
+        stream = container.streams.video[0]
+        fps = _pyav_fps(stream)
+        if not fps:
+            # Frame numbers are derived from timestamps and fps, so every frame would be 0
+            container.close()
+            raise ValueError(f"Error: Could not determine the frame rate of {video_path}")
+        # Some containers don't store a frame count; estimate it from the duration (in microseconds)
+        total_frames = stream.frames or int((container.duration or 0) / 1_000_000 * fps)
+        letterbox = _letterbox_geometry(*_frame_size(container, decoder), imgsz=imgsz)
+        return container, fps, total_frames, letterbox
+    
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise ValueError(f"Error: Could not open video file {video_path}")
+    letterbox = None
+    if torch.cuda.is_available():
+        # _read_frame_batches letterboxes frames on the GPU
+        letterbox = _letterbox_geometry(*_frame_size(cap, decoder), imgsz=imgsz)
+    return cap, cap.get(cv2.CAP_PROP_FPS), int(cap.get(cv2.CAP_PROP_FRAME_COUNT)), letterbox
+
+
+def _close_video(source, decoder):
+    """Release a source returned by _open_video"""
+    if decoder == 'opencv':
+        source.release()
+    elif decoder == 'pyav':
+        source.close()
+
+
+def _build_predict_args(model, conf_threshold, imgsz, fp16, target_classes):
+    """Keyword arguments shared by every model.predict call"""
+    predict_args = {'conf': conf_threshold, 'imgsz': imgsz, 'verbose': False}
+    if torch.cuda.is_available():
+        # Pin the device so Ultralytics doesn't re-resolve it on every call
+        predict_args['device'] = 0
+        if fp16:
+            # Half precision is only supported on GPU
+            predict_args['half'] = True
+    if target_classes is not None:
+        # Filter classes inside YOLO's NMS instead of after inference
+        class_ids_by_name = {name: class_id for class_id, name in model.names.items()}
+        unknown_classes = [name for name in target_classes if name not in class_ids_by_name]
+        if unknown_classes:
+            print(f"Warning: unknown classes ignored: {', '.join(unknown_classes)}")
+        predict_args['classes'] = [class_ids_by_name[name] for name in target_classes
+                                   if name in class_ids_by_name]
+    return predict_args
+
+
+def _detect_frame_range(model, source, decoder, total_frames, letterbox, predict_args,
+                        batch_size, frame_stride, prefetch, start_frame=0, end_frame=None,
+                        on_detections=None, progress_position=0):
+    """
+    Detect objects in frames [start_frame, end_frame) of an opened video source.
+    source, total_frames and letterbox are as returned by _open_video.
+    
+    Returns a dict with per-class detection columns ('detections'), class ids
+    ('class_ids'), detection counts ('counts') and first/last frame numbers
+    ('first_frames', 'last_frames'). If on_detections is given, it is called with
+    (class_name, class_id, frame_numbers, confidence, bbox_xyxy) for every batch
+    instead, and 'detections' stays empty. Progress is shown as a tqdm bar on line
+    progress_position.
+    """
+    # Store detection results as per-class columns, plus running aggregates for the summary
+    detections = defaultdict(lambda: {'frame_number': [], 'confidence': [], 'bbox_xyxy': []})
+    class_ids = {}
+    class_counts = Counter()
+    first_frames = {}
+    last_frames = {}
+    if letterbox is not None:
+        # Boxes on letterboxed tensor input are in input coordinates; map them back
+        # to the frame with (xyxy - pad) / gain, clipped to the frame
+        box_pad = np.array(letterbox['pad'] * 2)
+        box_gain = letterbox['gain']
+        frame_height, frame_width = letterbox['frame_size']
+        box_max = np.array([frame_width, frame_height] * 2)
+    # model.names can be a property chain on exported models; resolve it once per range
+    class_names = np.array([model.names[i] for i in range(len(model.names))], dtype=object)
+    
+    def store_detections(batch_indices, results):
+        """Store the detections of one batch of YOLO results"""
+        box_counts = [len(result.boxes) for result in results]
+        if not sum(box_counts):
+            return
+        
+        # Concatenate the whole batch on the device and copy each tensor to host once
+        frame_numbers = np.repeat(np.asarray(batch_indices, dtype=np.int64), box_counts)
+        cls = torch.cat([result.boxes.cls for result in results]).cpu().numpy().astype(np.int32)
+        conf = torch.cat([result.boxes.conf for result in results]).cpu().numpy()
+        xyxy = torch.cat([result.boxes.xyxy for result in results]).cpu().numpy()
+        if letterbox is not None:
+            xyxy = np.clip((xyxy - box_pad) / box_gain, 0, box_max)
+        
+        # Split the batch by class with boolean masks; rows keep their frame order
+        for class_id in np.unique(cls).tolist():
+            mask = cls == class_id
+            class_name = class_names[class_id]
+            class_frames = frame_numbers[mask]
+            
+            if on_detections is not None:
+                on_detections(class_name, class_id, class_frames, conf[mask], xyxy[mask])
+            else:
+                # Store detections as compact array chunks, concatenated once the range is done
+                columns = detections[class_name]
+                columns['frame_number'].append(class_frames.astype(np.int32))
+                columns['confidence'].append(conf[mask].astype(np.float32))
+                columns['bbox_xyxy'].append(xyxy[mask].astype(np.float32))
+            class_ids[class_name] = class_id
+            class_counts[class_name] += len(class_frames)
+            first_frames.setdefault(class_name, int(class_frames[0]))
+            last_frames[class_name] = int(class_frames[-1])
+    
+    aggregator_errors = []
+    
+    def aggregate_results():
+        """Aggregator stage: store detections from (frame_indices, results) batches"""
+        try:
+            while True:
+                item = _get_unless_stopped(result_queue, stop_event)
+                if item is None:
+                    break
+                store_detections(*item)
+        except Exception as e:
+            aggregator_errors.append(e)
+            stop_event.set()
+    
+    half = predict_args.get('half', False)
+    readers = {'opencv': _read_frame_batches, 'pyav': _read_pyav_batches, 'torchcodec': _read_tensor_batches}
+    reader_target = readers[decoder]
+    reader_args = (source, batch_size, frame_stride, letterbox, half, start_frame, end_frame)
+    
+    # Three-stage pipeline: a reader thread decodes frames, this thread runs
+    # inference, and an aggregator thread post-processes results, so decoding,
+    # inference and post-processing of consecutive batches overlap
+    batch_queue = queue.Queue(maxsize=prefetch)
+    result_queue = queue.Queue(maxsize=prefetch)
+    stop_event = threading.Event()
+    reader = threading.Thread(
+        target=reader_target,
+        args=reader_args + (batch_queue, stop_event),
+        daemon=True
+    )
+    aggregator = threading.Thread(target=aggregate_results, daemon=True)
+    reader.start()
+    aggregator.start()
+    
+    range_end = total_frames if end_frame is None else end_frame
+    progress = tqdm(total=range_end - start_frame, unit='frame', position=progress_position,
+                    desc=f"Frames {start_frame}-{range_end}")
+    try:
+        if torch.cuda.is_available():
+            # Warm up with a batch shaped like the reader's (a full batch of model input
+            # tensors, see _make_frame_uploader) and the same predict arguments, so
+            # CUDA/engine setup overlaps with decoding of the first batch
+            warmup_batch = torch.zeros((batch_size, 3, *letterbox['input_size']),
+                                       dtype=torch.float16 if half else torch.float32, device='cuda')
+            model.predict(warmup_batch, **predict_args)
+        
+        while True:
+            batch = _get_unless_stopped(batch_queue, stop_event)
+            if batch is None:
+                break
+            if isinstance(batch, Exception):
+                raise batch
+            batch_indices, batch_frames = batch
+            results = model.predict(batch_frames, **predict_args)
+            if not _put_unless_stopped(result_queue, (batch_indices, results), stop_event):
+                break
+            progress.update(batch_indices[-1] + 1 - start_frame - progress.n)
+        
+        # Frames after the last sampled one were read too
+        progress.update(max(0, progress.total - progress.n))
+        
+        # Let the aggregator drain the remaining results
+        _put_unless_stopped(result_queue, None, stop_event)
+        aggregator.join()
+    finally:
+        progress.close()
+        stop_event.set()
+        reader.join()
+        aggregator.join()
+    
+    if aggregator_errors:
+        raise aggregator_errors[0]
+    
+    # One array per column, in plain dicts so the result pickles compactly from workers
+    return {
+        'detections': {
+            class_name: {key: np.concatenate(chunks) for key, chunks in columns.items()}
+            for class_name, columns in detections.items()
+        },
+        'class_ids': class_ids,
+        'counts': dict(class_counts),
+        'first_frames': first_frames,
+        'last_frames': last_frames
+    }
+
+
+def _detection_columns(class_id, frame_numbers, confidence, bbox_xyxy, fps):
+    """Output columns (as in detections_by_class) for one class's detections"""
+    frame_numbers = np.asarray(frame_numbers, dtype=np.int64)
+    timestamp_seconds = frame_numbers / fps if fps > 0 else np.zeros(len(frame_numbers))
+    return {
+        'class_id': class_id,
+        'frame_number': frame_numbers,
+        'timestamp_seconds': np.round(timestamp_seconds, 3),
+        'timestamp_formatted': format_timestamps_vec(timestamp_seconds).tolist(),
+        'confidence': np.round(np.asarray(confidence, dtype=np.float64), 3),
+        'bbox_xyxy': np.round(np.asarray(bbox_xyxy, dtype=np.float64), 2)
+    }
+
+
+# Per-process model and predict arguments for multi-process detection (set by _init_worker)
+_worker_state = {}
+
+
+def _init_worker(model_path, model_args, conf_threshold, target_classes):
+    """Pool initializer: load the YOLO model once per worker process"""
+    # Each worker gets one CPU thread so N workers don't oversubscribe the cores
+    torch.set_num_threads(1)
+    try:
+        model = load_model(model_path, **model_args)
+        _worker_state['model'] = model
+        _worker_state['predict_args'] = _build_predict_args(model, conf_threshold, model_args['imgsz'],
+                                                            model_args['fp16'], target_classes)
+    except Exception as e:
+        # An initializer that raises makes the Pool respawn workers forever; keep the
+        # error and raise it from _detect_shard so pool.map fails instead
+        _worker_state['error'] = e
+
+
+def _detect_shard(shard):
+    """Pool task: detect objects in one contiguous frame range of the video"""
+    video_path, decoder, batch_size, frame_stride, imgsz, prefetch, start_frame, end_frame, index = shard
+    if 'error' in _worker_state:
+        raise _worker_state['error']
+    source, _, total_frames, letterbox = _open_video(video_path, decoder, imgsz=imgsz)
+    try:
+        return _detect_frame_range(_worker_state['model'], source, decoder, total_frames, letterbox,
+                                   _worker_state['predict_args'], batch_size, frame_stride,
+                                   prefetch, start_frame, end_frame, progress_position=index)
+    finally:
+        _close_video(source, decoder)
+
+
 def detect_objects_in_video(video_path, model_path='yolov8n.pt', conf_threshold=0.25, 
-                           target_classes=None, output_format='json'):
+                           target_classes=None, output_format='json', batch_size=16,
+                           frame_stride=1, fp16=True, use_tensorrt=True, decoder='opencv',
+                           imgsz=640, prefetch=2, jobs=1, use_openvino=False, stream_writer=None):
     """
     Detect objects in a video and extract timestamps.
     
@@ -28,90 +684,114 @@ def detect_objects_in_video(video_path, model_path='yolov8n.pt', conf_threshold=
         conf_threshold: Confidence threshold for detections (default: 0.25)
         target_classes: List of class names to track (None = all classes)
         output_format: Output format - 'json' or 'csv' (default: 'json')
+        batch_size: Number of frames sent to the model per inference call (default: 16)
+        frame_stride: Run detection on every Nth frame only (default: 1 = every frame)
+        fp16: Use half-precision inference when a CUDA GPU is available (default: True)
+        use_tensorrt: Run a cached TensorRT engine when a CUDA GPU is available (default: True)
+        decoder: 'opencv' (CPU decode), 'pyav' (threaded FFmpeg decode straight to RGB) or
+                 'torchcodec' (NVDEC decode straight into GPU tensors; Ultralytics still
+                 copies each resized batch back to the host in postprocessing)
+                 (default: 'opencv')
+        imgsz: Model input size; smaller is faster but may miss small objects (default: 640)
+        prefetch: Batches buffered between the decode, inference and aggregation stages (default: 2)
+        jobs: Number of worker processes, each with its own model, that split the video
+              into contiguous frame ranges (default: 1 = run in this process)
+        use_openvino: Run a cached OpenVINO export when no CUDA GPU is available (default: False)
+        stream_writer: Called with (class_name, columns) for every batch of detections as
+                       they are produced, e.g. from stream_results(). Detections are then
+                       not kept in memory and detections_by_class is left empty; the
+                       summary is still filled in. Requires jobs=1 (default: None)
     
     Returns:
         Dictionary containing detection results with timestamps
     """
     
-    # Load YOLO model
-    print(f"Loading YOLO model: {model_path}")
-    model = YOLO(model_path)
-    
-    # Open video file
-    cap = cv2.VideoCapture(video_path)
-    if not cap.isOpened():
-        raise ValueError(f"Error: Could not open video file {video_path}")
+    if frame_stride < 1:
+        raise ValueError(f"frame_stride must be >= 1, got {frame_stride}")
+    if decoder not in ('opencv', 'pyav', 'torchcodec'):
+        raise ValueError(f"Unsupported decoder: {decoder}")
+    if jobs < 1:
+        raise ValueError(f"jobs must be >= 1, got {jobs}")
+    if stream_writer is not None and jobs > 1:
+        raise ValueError("stream_writer requires jobs=1")
     
-    # Get video properties
-    fps = cap.get(cv2.CAP_PROP_FPS)
-    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    # Open video file and get video properties
+    source, fps, total_frames, letterbox = _open_video(video_path, decoder, imgsz=imgsz)
     video_duration = total_frames / fps if fps > 0 else 0
     
     print(f"Video FPS: {fps:.2f}")
     print(f"Total frames: {total_frames}")
     print(f"Video duration: {format_timestamp(video_duration)}")
-    print(f"Processing video...")
-    
-    # Store detection results
-    detections = defaultdict(list)
-    frame_number = 0
-    
-    # Process video frame by frame
-    while cap.isOpened():
-        ret, frame = cap.read()
-        if not ret:
-            break
-        
-        # Calculate timestamp for current frame
-        timestamp_seconds = frame_number / fps if fps > 0 else 0
-        timestamp_formatted = format_timestamp(timestamp_seconds)
-        
-        # Run YOLO detection
-        results = model(frame, conf=conf_threshold, verbose=False)
-        
-        # Process detections
-        for result in results:
-            boxes = result.boxes
-            for box in boxes:
-                # Get class name and confidence
-                class_id = int(box.cls[0])
-                class_name = model.names[class_id]
-                confidence = float(box.conf[0])
-                
-                # Filter by target classes if specified
-                if target_classes is not None and class_name not in target_classes:
-                    continue
-                
-                # Get bounding box coordinates
-                x1, y1, x2, y2 = box.xyxy[0].cpu().numpy()
-                
-                # Store detection
-                detection = {
-                    'timestamp_seconds': round(timestamp_seconds, 3),
-                    'timestamp_formatted': timestamp_formatted,
-                    'frame_number': frame_number,
-                    'class_name': class_name,
-                    'class_id': class_id,
-                    'confidence': round(confidence, 3),
-                    'bbox': {
-                        'x1': round(float(x1), 2),
-                        'y1': round(float(y1), 2),
-                        'x2': round(float(x2), 2),
-                        'y2': round(float(y2), 2)
-                    }
-                }
-                
-                detections[class_name].append(detection)
+    
+    model_args = {'fp16': fp16, 'batch_size': batch_size, 'use_tensorrt': use_tensorrt,
+                  'imgsz': imgsz, 'use_openvino': use_openvino}
+    if jobs == 1:
+        # Load YOLO model
+        print(f"Loading YOLO model: {model_path}")
+        model = load_model(model_path, **model_args)
+        predict_args = _build_predict_args(model, conf_threshold, imgsz, fp16, target_classes)
+        
+        def stream_detections(class_name, class_id, frame_numbers, confidence, bbox_xyxy):
+            stream_writer(class_name, _detection_columns(class_id, frame_numbers, confidence,
+                                                         bbox_xyxy, fps))
+        
+        print(f"Processing video...")
+        try:
+            shard_results = [_detect_frame_range(model, source, decoder, total_frames, letterbox,
+                                                 predict_args, batch_size, frame_stride, prefetch,
+                                                 on_detections=stream_detections if stream_writer else None)]
+        finally:
+            _close_video(source, decoder)
+    else:
+        _close_video(source, decoder)
+        if torch.cuda.is_available() and use_tensorrt or not torch.cuda.is_available() and use_openvino:
+            # Export once here rather than racing to export in every worker
+            load_model(model_path, **model_args)
         
-        frame_number += 1
+        # Contiguous frame ranges; the last one runs to the end of the video
+        shard_size = -(-total_frames // jobs)
+        shards = [
+            (video_path, decoder, batch_size, frame_stride, imgsz, prefetch, start_frame,
+             start_frame + shard_size if start_frame + shard_size < total_frames else None, index)
+            for index, start_frame in enumerate(range(0, max(total_frames, 1), shard_size or 1))
+        ]
         
-        # Progress update every 100 frames
-        if frame_number % 100 == 0:
-            progress = (frame_number / total_frames) * 100
-            print(f"Progress: {progress:.1f}% ({frame_number}/{total_frames} frames)")
+        print(f"Processing video with {len(shards)} worker processes...")
+        # spawn (not fork) so each worker can initialise CUDA on its own
+        context = multiprocessing.get_context('spawn')
+        with context.Pool(len(shards), initializer=_init_worker,
+                          initargs=(model_path, model_args, conf_threshold, target_classes)) as pool:
+            shard_results = pool.map(_detect_shard, shards)
+    
+    # Merge frame ranges in order, so every class stays sorted by frame number
+    detections = defaultdict(lambda: {'frame_number': [], 'confidence': [], 'bbox_xyxy': []})
+    class_ids = {}
+    class_counts = Counter()
+    first_frames = {}
+    last_frames = {}
+    for shard_result in shard_results:
+        for class_name, columns in shard_result['detections'].items():
+            for key, values in columns.items():
+                detections[class_name][key].append(values)
+        class_ids.update(shard_result['class_ids'])
+        class_counts.update(shard_result['counts'])
+        for class_name, frame_idx in shard_result['first_frames'].items():
+            first_frames.setdefault(class_name, frame_idx)
+        last_frames.update(shard_result['last_frames'])
     
-    cap.release()
-    print(f"Processing complete! Detected {sum(len(v) for v in detections.values())} objects")
+    def frame_seconds(frame_idx):
+        return frame_idx / fps if fps > 0 else 0
+    
+    # Join per-range arrays and format timestamps in one pass per class
+    detections_by_class = {
+        class_name: _detection_columns(class_ids[class_name], np.concatenate(columns['frame_number']),
+                                       np.concatenate(columns['confidence']),
+                                       np.concatenate(columns['bbox_xyxy']), fps)
+        for class_name, columns in detections.items()
+    }
+    
+    total_detections = sum(class_counts.values())
+    print(f"Processing complete! Detected {total_detections} objects")
     
     # Prepare output data
     output_data = {
@@ -125,27 +805,115 @@ def detect_objects_in_video(video_path, model_path='yolov8n.pt', conf_threshold=
         'detection_settings': {
             'model': model_path,
             'confidence_threshold': conf_threshold,
+            'frame_stride': frame_stride,
+            'imgsz': imgsz,
+            'half_precision': fp16 and torch.cuda.is_available(),
+            'decoder': decoder,
+            'jobs': jobs,
             'target_classes': target_classes if target_classes else 'all classes'
         },
-        'detections_by_class': dict(detections),
+        'detections_by_class': detections_by_class,
+        'total_detections': total_detections,
         'summary': {
             class_name: {
-                'count': len(detections_list),
-                'first_appearance': detections_list[0]['timestamp_formatted'] if detections_list else None,
-                'last_appearance': detections_list[-1]['timestamp_formatted'] if detections_list else None
+                'count': count,
+                'first_appearance': format_timestamp(frame_seconds(first_frames[class_name])),
+                'last_appearance': format_timestamp(frame_seconds(last_frames[class_name])),
+                'first_appearance_seconds': round(frame_seconds(first_frames[class_name]), 3),
+                'last_appearance_seconds': round(frame_seconds(last_frames[class_name]), 3)
             }
-            for class_name, detections_list in detections.items()
+            for class_name, count in class_counts.items()
         }
     }
     
     return output_data
 
 
+def _json_default(obj):
+    """json.dumps fallback for the NumPy arrays and scalars in detection results"""
+    if isinstance(obj, (np.ndarray, np.generic)):
+        return obj.tolist()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def encode_results_json(data):
+    """Encode detection results as indented JSON bytes"""
+    if orjson is None:
+        return json.dumps(data, indent=2, default=_json_default).encode()
+    return orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY)
+
+
+CSV_HEADER = ['Timestamp (seconds)', 'Timestamp (formatted)', 'Frame',
+              'Class', 'Confidence', 'X1', 'Y1', 'X2', 'Y2']
+
+
+def _write_csv_rows(writer, class_name, columns):
+    """Write one class's detection columns as CSV rows"""
+    bboxes = np.asarray(columns['bbox_xyxy']).reshape(-1, 4).tolist()
+    for row in zip(np.asarray(columns['timestamp_seconds']).tolist(),
+                   columns['timestamp_formatted'],
+                   np.asarray(columns['frame_number']).tolist(),
+                   np.asarray(columns['confidence']).tolist(),
+                   bboxes):
+        timestamp_seconds, timestamp_formatted, frame_number, confidence, bbox = row
+        writer.writerow([timestamp_seconds, timestamp_formatted, frame_number,
+                         class_name, confidence, *bbox])
+
+
+def _encode_json_line(obj):
+    """Encode one JSON Lines record as compact bytes"""
+    if orjson is None:
+        return json.dumps(obj, separators=(',', ':')).encode() + b'\n'
+    return orjson.dumps(obj) + b'\n'
+
+
+@contextmanager
+def stream_results(output_path, format='json'):
+    """
+    Open output_path and yield a stream_writer for detect_objects_in_video that
+    appends detections as they are produced: one JSON object per line (JSONL) for
+    'json', or rows with the same columns as save_results for 'csv'.
+    """
+    if format.lower() == 'json':
+        with open(output_path, 'wb') as f:
+            def write_jsonl(class_name, columns):
+                bboxes = np.asarray(columns['bbox_xyxy']).reshape(-1, 4).tolist()
+                for row in zip(np.asarray(columns['frame_number']).tolist(),
+                               np.asarray(columns['timestamp_seconds']).tolist(),
+                               columns['timestamp_formatted'],
+                               np.asarray(columns['confidence']).tolist(),
+                               bboxes):
+                    frame_number, timestamp_seconds, timestamp_formatted, confidence, bbox = row
+                    f.write(_encode_json_line({
+                        'class': class_name,
+                        'class_id': columns['class_id'],
+                        'frame_number': frame_number,
+                        'timestamp_seconds': timestamp_seconds,
+                        'timestamp_formatted': timestamp_formatted,
+                        'confidence': confidence,
+                        'bbox_xyxy': bbox
+                    }))
+            
+            yield write_jsonl
+    
+    elif format.lower() == 'csv':
+        import csv
+        with open(output_path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(CSV_HEADER)
+            yield lambda class_name, columns: _write_csv_rows(writer, class_name, columns)
+    
+    else:
+        raise ValueError(f"Unsupported output format: {format}")
+    
+    print(f"Results saved to: {output_path}")
+
+
 def save_results(data, output_path, format='json'):
     """Save detection results to file"""
     if format.lower() == 'json':
-        with open(output_path, 'w') as f:
-            json.dump(data, f, indent=2)
+        with open(output_path, 'wb') as f:
+            f.write(encode_results_json(data))
         print(f"Results saved to: {output_path}")
     
     elif format.lower() == 'csv':
@@ -153,23 +921,11 @@ def save_results(data, output_path, format='json'):
         with open(output_path, 'w', newline='') as f:
             writer = csv.writer(f)
             # Write header
-            writer.writerow(['Timestamp (seconds)', 'Timestamp (formatted)', 'Frame', 
-                           'Class', 'Confidence', 'X1', 'Y1', 'X2', 'Y2'])
+            writer.writerow(CSV_HEADER)
             
             # Write detections
-            for class_name, detections_list in data['detections_by_class'].items():
-                for det in detections_list:
-                    writer.writerow([
-                        det['timestamp_seconds'],
-                        det['timestamp_formatted'],
-                        det['frame_number'],
-                        det['class_name'],
-                        det['confidence'],
-                        det['bbox']['x1'],
-                        det['bbox']['y1'],
-                        det['bbox']['x2'],
-                        det['bbox']['y2']
-                    ])
+            for class_name, columns in data['detections_by_class'].items():
+                _write_csv_rows(writer, class_name, columns)
         print(f"Results saved to: {output_path}")
     
     else:
@@ -189,6 +945,23 @@ def main():
                        help='Output file path (default: video_name_timestamps.json)')
     parser.add_argument('--format', type=str, choices=['json', 'csv'], default='json',
                        help='Output format: json or csv (default: json)')
+    parser.add_argument('--batch', type=int, default=16,
+                       help='Number of frames per inference call (default: 16)')
+    parser.add_argument('--stride', type=int, default=1,
+                       help='Run detection on every Nth frame only (default: 1 = every frame)')
+    parser.add_argument('--no-half', dest='half', action='store_false',
+                       help='Disable FP16 inference on CUDA GPUs (FP16 is used by default)')
+    parser.add_argument('--decoder', type=str, choices=['opencv', 'pyav', 'torchcodec'], default='opencv',
+                       help='Video decoder: opencv, pyav (threaded FFmpeg) or torchcodec (NVDEC) (default: opencv)')
+    parser.add_argument('--no-tensorrt', dest='tensorrt', action='store_false',
+                       help='Run the PyTorch weights on CUDA instead of exporting a TensorRT engine')
+    parser.add_argument('--openvino', action='store_true',
+                       help='Export to and run with OpenVINO when no CUDA GPU is available')
+    parser.add_argument('--stream', action='store_true',
+                       help='Write detections to the output as they are found instead of holding '
+                            'them in memory (JSON output becomes JSON Lines)')
+    parser.add_argument('--jobs', type=int, default=1,
+                       help='Worker processes that split the video into frame ranges (default: 1)')
     
     args = parser.parse_args()
     
@@ -200,21 +973,37 @@ def main():
     # Set output path
     if args.output is None:
         video_name = os.path.splitext(os.path.basename(args.video))[0]
-        ext = 'json' if args.format == 'json' else 'csv'
+        ext = args.format
+        if args.stream and ext == 'json':
+            ext = 'jsonl'
         args.output = f"{video_name}_timestamps.{ext}"
     
     # Run detection
     try:
-        results = detect_objects_in_video(
+        detect_args = dict(
             video_path=args.video,
             model_path=args.model,
             conf_threshold=args.conf,
             target_classes=args.classes,
-            output_format=args.format
+            output_format=args.format,
+            batch_size=args.batch,
+            frame_stride=args.stride,
+            fp16=args.half,
+            use_tensorrt=args.tensorrt,
+            decoder=args.decoder,
+            jobs=args.jobs,
+            use_openvino=args.openvino
         )
         
-        # Save results
-        save_results(results, args.output, format=args.format)
+        if args.stream:
+            # Detections are written as they are found
+            with stream_results(args.output, format=args.format) as stream_writer:
+                results = detect_objects_in_video(**detect_args, stream_writer=stream_writer)
+        else:
+            results = detect_objects_in_video(**detect_args)
+            
+            # Save results
+            save_results(results, args.output, format=args.format)
         
         # Print summary
         print("\n" + "="*50)
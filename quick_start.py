@@ -53,8 +53,7 @@ def quick_start(video_path, classes=None):
             print(f"  Last:  {summary['last_appearance']}")
             print()
         
-        total_detections = sum(len(v) for v in results['detections_by_class'].values())
-        print(f"Total detections: {total_detections}")
+        print(f"Total detections: {results['total_detections']}")
         print("=" * 60)
         
         return results